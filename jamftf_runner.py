@@ -13,10 +13,16 @@ import sys
 import argparse
 import re
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from urllib.parse import urlparse
 from typing import Any, Iterable
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
 # ---------- jamfpy import + compatibility patch ----------
 def import_and_patch_jamfpy():
     try:
@@ -44,8 +50,6 @@ def import_and_patch_jamfpy():
 
     return jamfpy, jt
 
-jamfpy, jt = import_and_patch_jamfpy()
-
 # ---------- jamftf immport ----------
 def import_jamftf():
     try:
@@ -60,6 +64,9 @@ def import_jamftf():
         )
 
 # ---------- helpers ----------
+# sentinel for "not given / not present" where None is a meaningful value
+_MISSING = object()
+
 def env_values():
     url  = os.getenv("JAMF_URL")
     cid  = os.getenv("JAMF_CLIENT_ID")
@@ -70,7 +77,10 @@ def env_values():
     host = (p.netloc or url.replace("https://","").replace("http://","")).strip("/")
     return (host, f"https://{host}"), cid, csec
 
-def build_client():
+# token methods exposed by different jamfpy builds, in order of preference
+_AUTH_METHODS = ("authenticate", "get_token", "login", "generate_token")
+
+def build_client(jt):
     fqdn_candidates, cid, csec = env_values()
 
     http_cfg = jt.HTTPConfig()
@@ -94,15 +104,13 @@ def build_client():
             )
             print(f"[runner] Tenant OK with fqdn='{fq}', auth_method='oauth2'")
             # otional explicit token call harmless if not needed
-            for m in ("authenticate", "get_token", "login", "generate_token"):
-                fn = getattr(t, m, None)
-                if callable(fn):
-                    try:
-                        fn()
-                        print(f"[runner] {m} OK")
-                        break
-                    except Exception as e:
-                        print(f"[runner] {m} failed: {e}")
+            m = next((name for name in _AUTH_METHODS if callable(getattr(t, name, None))), None)
+            if m:
+                try:
+                    getattr(t, m)()
+                    print(f"[runner] {m} OK")
+                except Exception as e:
+                    print(f"[runner] {m} failed: {e}")
             return t
         except Exception as e:
             tried.append((fq, str(e)))
@@ -113,9 +121,21 @@ def build_client():
     msg += f"VALID_AUTH_METHODS: {getattr(jt, 'VALID_AUTH_METHODS', None)}\n"
     sys.exit(msg)
 
+_SANITIZE_RE = re.compile(r"[^a-z0-9_]+")
+
+# ascii fast path: lowercase letters, turn every other disallowed char into a space
+# so that split() collapses the runs and drops them at the edges
+_SANI_TABLE = str.maketrans({
+    chr(c): (chr(c).lower() if chr(c).isalnum() or chr(c) == "_" else " ")
+    for c in range(128)
+})
+
 def sanitize_name(s: str) -> str:
-    s = str(s).strip().lower()
-    s = re.sub(r"[^a-z0-9_]+", "_", s)
+    s = str(s)
+    if s.isascii():
+        s = "_".join(s.translate(_SANI_TABLE).split())
+    else:
+        s = _SANITIZE_RE.sub("_", s.strip().lower())
     s = s.strip("_")
     if not s or s[0].isdigit():
         s = f"r_{s}" if s else "r"
@@ -129,6 +149,9 @@ def _json_try_parse(s: Any):
             return None
     return None
 
+_CONTAINER_ATTRS = ("data", "_data", "payload", "_payload", "raw", "_raw", "value", "_value", "item", "obj", "object", "response", "record", "entity", "document", "body")
+_CONVERT_METHS = ("to_dict", "dict", "model_dump")
+
 def obj_to_dict_deep(obj: Any, max_depth: int = 3) -> dict | None:
     """
     Convert jamfpy SingleItem-like wrappers into dicts by probing lots of shapes, recursively.
@@ -155,7 +178,7 @@ def obj_to_dict_deep(obj: Any, max_depth: int = 3) -> dict | None:
                 pass
 
         # explicit known containers
-        for attr in ("data", "_data", "payload", "_payload", "raw", "_raw", "value", "_value", "item", "obj", "object", "response", "record", "entity", "document", "body"):
+        for attr in _CONTAINER_ATTRS:
             v = getattr(o, attr, None)
             if isinstance(v, dict):
                 return v
@@ -165,7 +188,7 @@ def obj_to_dict_deep(obj: Any, max_depth: int = 3) -> dict | None:
                     return d
 
         # common conversion methods
-        for meth in ("to_dict", "dict", "model_dump"):
+        for meth in _CONVERT_METHS:
             fn = getattr(o, meth, None)
             if callable(fn):
                 try:
@@ -189,16 +212,18 @@ def obj_to_dict_deep(obj: Any, max_depth: int = 3) -> dict | None:
             except Exception:
                 pass
 
-        # try vars()
+        # try the instance __dict__
         try:
-            v = vars(o)
+            v = getattr(o, "__dict__", None)
             if isinstance(v, dict) and v:
                 # unwrap one level if possible
                 # sometimes the real payload sits under a single key inside __dict__
-                if len(v) == 1 and isinstance(next(iter(v.values())), (dict, object)):
-                    d = _walk(next(iter(v.values())), depth - 1)
-                    if isinstance(d, dict):
-                        return d
+                if len(v) == 1:
+                    inner = next(iter(v.values()))
+                    if not isinstance(inner, (str, bytes, int, float, bool)):
+                        d = _walk(inner, depth - 1)
+                        if isinstance(d, dict):
+                            return d
                 return v
         except Exception:
             pass
@@ -207,102 +232,73 @@ def obj_to_dict_deep(obj: Any, max_depth: int = 3) -> dict | None:
 
     return _walk(obj, max_depth)
 
-def extract_id_any(item: Any) -> str | None:
-    d = obj_to_dict_deep(item, max_depth=3)
-    # common ID fields (now includes 'jpro_id')
-    if isinstance(d, dict):
-        for k in ("jpro_id", "id", "Id", "ID", "profileId", "profileID", "uuid", "uid"):
-            if k in d and d[k] is not None and d[k] != "":
-                return str(d[k])
-        # common nested areas
-        for k in ("general", "profile", "configurationProfile", "payloadContent", "data"):
-            sub = d.get(k)
-            if isinstance(sub, dict):
-                for ik in ("jpro_id", "id", "uuid", "profileId"):
-                    if sub.get(ik):
-                        return str(sub[ik])
+_ID_KEYS = ("jpro_id", "id", "Id", "ID", "profileId", "profileID", "uuid", "uid")
+# narrower, differently ordered list for nested areas and mapping-style get()
+_ID_NESTED_KEYS = ("jpro_id", "id", "uuid", "profileId")
+# wrapper keys that commonly hold the real id/name fields
+_ID_NESTED = ("general", "profile", "configurationProfile", "payloadContent", "data")
 
-    # tttribute fallbacks
-    for k in ("jpro_id", "id", "Id", "ID", "profileId", "profileID", "uuid", "uid"):
-        v = getattr(item, k, None)
-        if v:
-            return str(v)
-    # mapping style get
-    get = getattr(item, "get", None)
-    if callable(get):
-        for k in ("jpro_id", "id", "uuid", "profileId"):
-            try:
-                v = get(k)
-                if v:
-                    return str(v)
-            except Exception:
-                pass
-    # Indexing
-    try:
-        v = item["jpro_id"]  # typee: ignore[index]
-        if v:
-            return str(v)
-    except Exception:
-        pass
-    try:
-        v = item["id"]  # type: ignore[index]
-        if v:
-            return str(v)
-    except Exception:
-        pass
-
-    return None
-    d = obj_to_dict_deep(item, max_depth=3)
-    # common ID fields
+def extract_id_any(item: Any, d: Any = _MISSING) -> str | None:
+    # d is the item's precomputed dict view, which may itself be None
+    if d is _MISSING:
+        d = item if isinstance(item, dict) else obj_to_dict_deep(item, max_depth=3)
     if isinstance(d, dict):
-        for k in ("id", "Id", "ID", "profileId", "profileID", "uuid", "uid"):
-            if k in d and d[k]:
-                return str(d[k])
+        # common ID fields
+        for k in _ID_KEYS:
+            if v := d.get(k):
+                return str(v)
         # common nested areas
-        for k in ("general", "profile", "configurationProfile", "payloadContent", "data"):
+        for k in _ID_NESTED:
             sub = d.get(k)
             if isinstance(sub, dict):
-                for ik in ("id", "uuid", "profileId"):
-                    if sub.get(ik):
-                        return str(sub[ik])
+                for ik in _ID_NESTED_KEYS:
+                    if v := sub.get(ik):
+                        return str(v)
 
     # attribute fallbacks
-    for k in ("id", "Id", "ID", "profileId", "profileID", "uuid", "uid"):
+    for k in _ID_KEYS:
         v = getattr(item, k, None)
         if v:
             return str(v)
-    # mapping-style get
-    get = getattr(item, "get", None)
-    if callable(get):
-        for k in ("id", "uuid", "profileId"):
+
+    # a dict view already covers mapping-style access
+    if d is None:
+        get = getattr(item, "get", None)
+        if callable(get):
+            for k in _ID_NESTED_KEYS:
+                try:
+                    v = get(k)
+                    if v:
+                        return str(v)
+                except Exception:
+                    pass
+        for k in ("jpro_id", "id"):
             try:
-                v = get(k)
+                v = item[k]  # type: ignore[index]
                 if v:
                     return str(v)
             except Exception:
                 pass
-    # Indexing
-    try:
-        v = item["id"]  # type:: ignore[index]
-        if v:
-            return str(v)
-    except Exception:
-        pass
 
     return None
 
-def extract_name_any(item: Any, fallback_id: str) -> str:
-    d = obj_to_dict_deep(item, max_depth=3)
+_NAME_KEYS = ("name", "displayName", "profileName", "computer_group_name", "generalName")
+_NAME_ATTRS = ("name", "displayName", "profileName")
+
+def extract_name_any(item: Any, fallback_id: str, d: Any = _MISSING) -> str:
+    # d is the item's precomputed dict view, which may itself be None
+    if d is _MISSING:
+        d = item if isinstance(item, dict) else obj_to_dict_deep(item, max_depth=3)
     if isinstance(d, dict):
-        for k in ("name", "displayName", "profileName", "computer_group_name", "generalName"):
-            if d.get(k):
-                return sanitize_name(d[k])
-        for k in ("general", "profile", "configurationProfile", "payloadContent", "data"):
+        for k in _NAME_KEYS:
+            if v := d.get(k):
+                return sanitize_name(v)
+        for k in _ID_NESTED:
             sub = d.get(k)
-            if isinstance(sub, dict) and sub.get("name"):
-                return sanitize_name(sub["name"])
+            if isinstance(sub, dict) and (v := sub.get("name")):
+                return sanitize_name(v)
     # attribute fallback
-    for k in ("name", "displayName", "profileName"):
+    for k in _NAME_ATTRS:
         v = getattr(item, k, None)
         if v:
             return sanitize_name(v)
@@ -320,105 +316,152 @@ TERRAFORM_TYPE_MAP = {
     "COMPUTER_EXTENSION_ATTRIBUTE": "jamfpro_computer_extension_attribute",
 }
 
+_ITER_ATTRS = ("data", "_data", "dataset", "items", "all")
+_ITER_METHS = ("get_all", "to_list", "list", "all")
+
+def _call_for_list(fn) -> list[Any] | None:
+    # only the call and the materialisation can raise
+    try:
+        val = fn()
+    except Exception:
+        return None
+    if isinstance(val, list):
+        return val
+    if isinstance(val, Iterable):
+        try:
+            return list(val)
+        except Exception:
+            return None
+    return None
+
 def iter_items_from_resource(res) -> list[Any]:
     """
     Pull the fetched dataset from a jamftf resource instance.
     Accepts lists, iterables, pagers, etc.
     """
-    cand_attrs = ("data", "_data", "dataset", "items", "all")
-    for attr in cand_attrs:
-        obj = getattr(res, attr, None)
+    # jamftf resources keep a plain list in .data
+    data = getattr(res, "data", None)
+    if isinstance(data, list):
+        return data
+
+    for attr in _ITER_ATTRS:
+        obj = getattr(res, attr, _MISSING)
+        if obj is _MISSING or obj is None:
+            continue
         # method returning list/iterable
         if callable(obj):
-            try:
-                val = obj()
-                if isinstance(val, list):
-                    return val
-                if isinstance(val, Iterable):
-                    return list(val)
-            except Exception:
-                pass
+            val = _call_for_list(obj)
+            if val is not None:
+                return val
         # direct list/iterable
         if isinstance(obj, list):
             return obj
-        if obj is not None and hasattr(obj, "__iter__") and not isinstance(obj, (str, bytes, dict)):
+        if isinstance(obj, Iterable) and not isinstance(obj, (str, bytes, dict)):
             try:
                 return list(obj)
             except Exception:
                 pass
 
     # try common getter methods
-    for meth in ("get_all", "to_list", "list", "all"):
-        fn = getattr(res, meth, None)
+    for meth in _ITER_METHS:
+        fn = getattr(res, meth, _MISSING)
         if callable(fn):
-            try:
-                val = fn()
-                if isinstance(val, list):
-                    return val
-                if isinstance(val, Iterable):
-                    return list(val)
-            except Exception:
-                pass
+            val = _call_for_list(fn)
+            if val is not None:
+                return val
 
     return []
 
+_TAG_RE = re.compile(r"(MACOS_CONFIG_PROFILE|SCRIPT|CATEGORY|POLICY|STATIC_COMPUTER_GROUP|SMART_COMPUTER_GROUP|ADVANCED_COMPUTER_SEARCH|COMPUTER_EXTENSION_ATTRIBUTE)")
+
 def detect_tag(res) -> str:
     tag = getattr(res, "resource_type", None)
     if tag is None:
         tag = getattr(res, "provider_tag", None)
     tag_str = str(tag)
-    m = re.search(r"(MACOS_CONFIG_PROFILE|SCRIPT|CATEGORY|POLICY|STATIC_COMPUTER_GROUP|SMART_COMPUTER_GROUP|ADVANCED_COMPUTER_SEARCH|COMPUTER_EXTENSION_ATTRIBUTE)", tag_str)
+    m = _TAG_RE.search(tag_str)
     return m.group(1) if m else tag_str
 
-def compose_import_hcl(resources, dump_path: str | None = None) -> str:
-    blocks = []
+# max chars of an item repr in diagnostics, so huge payloads stay readable
+_REPR_CAP = 200
+
+# dump lines are written as utf-8 bytes; orjson is used when available
+if orjson is not None:
+    def _dump_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+else:
+    def _dump_line(obj: Any) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+def compose_import_hcl(resources, out_fp, dump_path: str | None = None) -> int:
+    """
+    Write import blocks for all resources to out_fp as they are generated.
+    Returns the number of lines written.
+    """
+    written = 0
+    sep = ""
+
+    def emit(block: str):
+        nonlocal written, sep
+        out_fp.write(sep)
+        out_fp.write(block)
+        # blank separator line plus the block's own lines
+        written += block.count("\n") + (2 if sep else 1)
+        sep = "\n\n"
+
     dumper = None
     dumped = 0
     dump_cap = 20  # dump a few more now that we're close
     if dump_path:
-        dumper = open(dump_path, "w", encoding="utf-8")
+        dumper = open(dump_path, "wb", buffering=1 << 20)
+
+    # local aliases for the per-item loop
+    to_dict = obj_to_dict_deep
+    extract_id = extract_id_any
+    extract_name = extract_name_any
+    dump_line = _dump_line
 
     for res in resources:
         tag = detect_tag(res)
-        tf_type = None
-        for key, val in TERRAFORM_TYPE_MAP.items():
-            if key in tag:
-                tf_type = val
-                break
+        tf_type = TERRAFORM_TYPE_MAP.get(tag)
         if not tf_type:
-            blocks.append(f"# Skipping unsupported resource tag: {tag}")
+            emit(f"# Skipping unsupported resource tag: {tag}")
             continue
 
         items = iter_items_from_resource(res)
         if not items:
-            blocks.append(f"# No items found for {tag}")
+            emit(f"# No items found for {tag}")
             continue
 
         for item in items:
-            if dumper and dumped < dump_cap:
+            # walk the item once and share the result with the dumper and extractors
+            d = item if isinstance(item, dict) else to_dict(item, max_depth=3)
+            if dumper:
                 try:
-                    d = obj_to_dict_deep(item, max_depth=3)
-                    dumper.write(json.dumps(d if d is not None else {"repr": repr(item)}, ensure_ascii=False) + "\n")
+                    dumper.write(dump_line(d if d is not None else {"repr": repr(item)[:_REPR_CAP]}))
                     dumped += 1
                 except Exception:
                     pass
+                if dumped >= dump_cap:
+                    # cap reached: close now so later items skip the dumper entirely
+                    dumper.close()
+                    dumper = None
 
-            rid = extract_id_any(item)
+            rid = extract_id(item, d)
             if not rid:
-                blocks.append(f"# Could not extract id for item in {tag}: {repr(item)}")
+                emit(f"# Could not extract id for item in {tag}: {repr(item)[:_REPR_CAP]}")
                 continue
-            local = extract_name_any(item, rid)
-            block = f"""import {{
-  id = "{rid}"
-  to = {tf_type}.{local}
-}}"""
-            blocks.append(block)
+            local = extract_name(item, rid, d)
+            emit("".join(('import {\n  id = "', rid, '"\n  to = ', tf_type, ".", local, "\n}")))
 
     if dumper:
         dumper.close()
+    if dump_path:
         print(f"[runner] Wrote sample dump to {dump_path}")
 
-    return "\n\n".join(blocks) + ("\n" if blocks else "")
+    if written:
+        out_fp.write("\n")
+    return written
 
 # ---------- main ----------
 def main():
@@ -426,10 +469,13 @@ def main():
     parser.add_argument("--config", required=True, help="Path to jamftf JSON config (e.g., jamftf.config.json).")
     parser.add_argument("--out", default="imports.hcl", help="Output HCL file path (default: imports.hcl).")
     parser.add_argument("--dump", default=None, help="Optional path to write JSONL of a few raw items.")
+    parser.add_argument("--workers", type=int, default=8, help="Max concurrent resource fetches (default: 8).")
     args = parser.parse_args()
 
+    # jamfpy is patched before jamftf is imported, since jamftf uses get_logger
+    _, jt = import_and_patch_jamfpy()
     parse_config_file = import_jamftf()
-    client = build_client()
+    client = build_client(jt)
 
     resources = parse_config_file(args.config)
     if not resources:
@@ -439,14 +485,19 @@ def main():
     # fetch
     for r in resources:
         r.set_client(client)
-        r.refresh_data()
 
-    # compose hcl ourselves
-    hcl = compose_import_hcl(resources, dump_path=args.dump)
+    # first fetch runs alone so the tenant has a token before the threads share it
+    resources[0].refresh_data()
+    rest = resources[1:]
+    if rest:
+        with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(rest)))) as ex:
+            list(ex.map(lambda r: r.refresh_data(), rest))
 
+    # compose hcl ourselves, streaming straight to the output file
     out = Path(args.out)
-    out.write_text(hcl, encoding="utf-8")
-    print(f"Wrote {out} with {len(hcl.splitlines())} lines.")
+    with open(out, "w", encoding="utf-8") as fp:
+        lines = compose_import_hcl(resources, fp, dump_path=args.dump)
+    print(f"Wrote {out} with {lines} lines.")
     return 0
 
 if __name__ == "__main__":